@@ -1,7 +1,11 @@
 import os
 import re
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Tuple, List
 
 from omegaconf import OmegaConf
@@ -13,135 +17,212 @@ from vectara_agentic.agent import Agent
 from vectara_agentic.tools import ToolsFactory, VectaraToolFactory
 from vectara_agentic.tools_catalog import summarize_text
 
-from dotenv import load_dotenv
-load_dotenv(override=True)
+# In containerized deployments env vars come from the orchestrator and there
+# is no .env file; skip the disk stat + parse in that case.
+if os.path.exists(".env"):
+    from dotenv import load_dotenv
+    load_dotenv(override=True)
+
+# Shared session so repeated calls to static.case.law reuse pooled keep-alive
+# connections instead of paying a TCP+TLS handshake per tool call.
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=50,
+    max_retries=Retry(total=3, connect=3, read=2, backoff_factor=0.3,
+                      status_forcelist=[429, 500, 502, 503, 504],
+                      allowed_methods=frozenset(['GET', 'HEAD']))
+))
+# Opinion JSON is long English text and compresses 5-10x; advertise brotli
+# (decoded via the brotli package) ahead of gzip.
+_session.headers.update({'Accept-Encoding': 'br, gzip'})
+_REQUEST_TIMEOUT = (3.05, 10)
+
+_CITATION_PATTERN = re.compile(r'^(\d+)\s+(.+?)\s+(\d+)$')
+_CITATION_SCAN_PATTERN = re.compile(r'\b(\d+)\s+([A-Z][A-Za-z0-9.]*(?:\s[A-Z][A-Za-z0-9.]*)*)\s+(\d+)\b')
+# The allowed URL shapes are pure prefixes, so a startswith check beats regex.
+_VALID_URL_PREFIXES = ("https://static.case.law/", "https://case.law/caselaw/?reporter=")
 
 citation_description = '''
     The citation for a particular case. 
     Citation must include the volume number, reporter, and first page. For example: 253 P.2d 136.
 '''
 
+@lru_cache(maxsize=4096)
 def extract_components_from_citation(citation: str) -> Tuple[int, str, int]:
-    citation_components = citation.split(' ')
-    volume_num = citation_components[0]
-    reporter = '-'.join(citation_components[1:-1]).replace('.', '').lower()
-    first_page = citation_components[-1]
+    match = _CITATION_PATTERN.match(citation.strip())
+    if match is None:
+        raise ValueError("citation must include a volume number, reporter, and first page, e.g. 253 P.2d 136.")
+    volume_num, reporter, first_page = match.groups()
+    reporter = reporter.replace('.', '').replace(' ', '-').lower()
+    return int(volume_num), reporter, int(first_page)
+
+@lru_cache(maxsize=1024)
+def _fetch_case_json(reporter: str, volume_num: int, first_page: int) -> Optional[dict]:
+    """
+    Fetches the case.law JSON for a case, or None if the case is not found.
+    Case law is immutable, so results are cached: when the agent calls several
+    tools for the same citation only the first call hits the network. Only
+    deterministic outcomes are cached - a 404 means the case does not exist,
+    but a timeout or connection error raises out of here (lru_cache does not
+    memoize exceptions) so the next call retries instead of serving a stale
+    "not found" for the life of the process.
+    """
+    response = _session.get(f"https://static.case.law/{reporter}/{volume_num}/cases/{first_page:04d}-01.json", timeout=_REQUEST_TIMEOUT)
+    if response.status_code != 200:
+        return None
+    # orjson parses the raw bytes directly, skipping the utf-8 decode that
+    # response.text performs; opinion JSON can be hundreds of KB.
+    return orjson.loads(response.content)
 
-    if not volume_num.isdigit():
-        raise ValueError("volume number must be a number.")
-    if not first_page.isdigit():
-        raise ValueError("first page number must be a number.")
+def _get_case_json(reporter: str, volume_num: int, first_page: int) -> Optional[dict]:
+    """
+    Cache-backed fetch that treats a transient network failure as a miss for
+    this call only: returns None now, without poisoning the shared cache.
+    """
+    try:
+        return _fetch_case_json(reporter, volume_num, first_page)
+    except (requests.Timeout, requests.ConnectionError):
+        return None
 
-    return int(volume_num), reporter, int(first_page)
+# Warms the case JSON cache while the LLM is still planning its tool calls;
+# daemon-style pool, callers never block on these futures.
+_prefetch_executor = ThreadPoolExecutor(max_workers=4)
 
-def create_assistant_tools(cfg):
+def prefetch_case_citations(text: str) -> None:
+    """
+    Scans text for case citations and warms the case JSON cache for each one
+    in the background, so later tool calls on those citations are cache hits.
+    """
+    for volume_num, reporter, first_page in _CITATION_SCAN_PATTERN.findall(text):
+        reporter = reporter.replace('.', '').replace(' ', '-').lower()
+        _prefetch_executor.submit(_get_case_json, reporter, int(volume_num), int(first_page))
+
+def get_opinion_text(
+        case_citation = Field(description = citation_description),
+        summarize: Optional[bool] = False
+        ) -> str:
+    """
+    Given case citation, returns the full opinion/ruling text of the case.
+    if summarize is True, the text is summarized.
+    If there is more than one opinion for the case, the type of each opinion is returned with the text,
+    and the opinions are separated by semicolons (;). With summarize=True a single summary
+    covering every opinion (labeled by type) is returned.
+    """
+    volume_num, reporter, first_page = extract_components_from_citation(case_citation)
+    res = _get_case_json(reporter, volume_num, first_page)
+    if res is None:
+        return "Case not found; please check the citation."
 
-    def get_opinion_text(
-            case_citation = Field(description = citation_description),
-            summarize: Optional[bool] = False
-            ) -> str:
-        """
-        Given case citation, returns the full opinion/ruling text of the case.
-        if summarize is True, the text is summarized.
-        If there is more than one opinion for the case, the type of each opinion is returned with the text, 
-        and the opinions (or their summaries) are separated by semicolons (;)
-        """
-        volume_num, reporter, first_page = extract_components_from_citation(case_citation)
-        response = requests.get(f"https://static.case.law/{reporter}/{volume_num}/cases/{first_page:04d}-01.json")
-        if response.status_code != 200:
-            return "Case not found; please check the citation."
-        res = json.loads(response.text)
-
-        if len(res["casebody"]["opinions"]) == 1:
-            text = res["casebody"]["opinions"][0]["text"]
-            output = text if not summarize else summarize_text(text, "law")
+    if len(res["casebody"]["opinions"]) == 1:
+        text = res["casebody"]["opinions"][0]["text"]
+        output = text if not summarize else summarize_text(text, "law")
+    else:
+        opinions = res["casebody"]["opinions"]
+        if summarize:
+            # Summarize all opinions in one LLM round-trip instead of one call per opinion.
+            combined = "\n\n".join(
+                f"Opinion type: {opinion['type']}\n{opinion['text']}"
+                for opinion in opinions
+            )
+            output = summarize_text(combined, "law")
         else:
-            output = ""
-            for opinion in res["casebody"]["opinions"]:
-                text = opinion["text"] if not summarize else summarize_text(opinion["text"], "law")
-                output += f"Opinion type: {opinion['type']}, text: {text};"
-        
-        return output
-
-    def get_case_document_pdf(
-            case_citation = Field(description = citation_description)
-            ) -> str:
-        """
-        Given a case citation, returns a valid web url to a pdf of the case record
-        """
-        volume_num, reporter, first_page = extract_components_from_citation(case_citation)
-        response = requests.get(f"https://static.case.law/{reporter}/{volume_num}/cases/{first_page:04d}-01.json")
-        if response.status_code != 200:
-            return "Case not found; please check the citation."
-        res = json.loads(response.text)
-        page_number = res["first_page_order"]
-        return f"https://static.case.law/{reporter}/{volume_num}.pdf#page={page_number}"
-
-    def get_case_document_page(
-            case_citation = Field(description = citation_description)
-            ) -> str:
-        """
-        Given a case citation, returns a valid web url to a page with information about the case.
-        """
-        volume_num, reporter, first_page = extract_components_from_citation(case_citation)
-        url = f"https://case.law/caselaw/?reporter={reporter}&volume={volume_num}&case={first_page:04d}-01"
-        response = requests.get(url)
-        if response.status_code != 200:
-            return "Case not found; please check the citation."
-        return url
-        
-    def get_case_name(
-            case_citation = Field(description = citation_description)
-            ) -> Tuple[str, str]:
-        """
-        Given a case citation, returns its name and name abbreviation.
-        """
-        volume_num, reporter, first_page = extract_components_from_citation(case_citation)
-        response = requests.get(f"https://static.case.law/{reporter}/{volume_num}/cases/{first_page:04d}-01.json")
-        if response.status_code != 200:
-            return "Case not found", "Case not found"
-        res = json.loads(response.text)
-        return res["name"], res["name_abbreviation"]
-
-    def get_cited_cases(
-            case_citation = Field(description = citation_description)
-            ) -> List[dict]:
-        """
-        Given a case citation, returns a list of cases that are cited by the opinion of this case.
-        The output is a list of cases, each a dict with the citation, name and name_abbreviation of the case.
-        """
-        volume_num, reporter, first_page = extract_components_from_citation(case_citation)
-        response = requests.get(f"https://static.case.law/{reporter}/{volume_num}/cases/{first_page:04d}-01.json")
-        if response.status_code != 200:
-            return "Case not found; please check the citation."
-        res = json.loads(response.text)
-        citations = res["cites_to"]
-        res = []
-        for citation in citations[:10]:
-            name, name_abbreviation = get_case_name(citation["cite"])
-            res.append({
-                "citation": citation["cite"],
-                "name": name,
-                "name_abbreviation": name_abbreviation
-            })
-        return res
-
-    def validate_url(
-            url = Field(description = "A web url pointing to case-law document")
+            output = "".join(
+                f"Opinion type: {opinion['type']}, text: {opinion['text']};"
+                for opinion in opinions
+            )
+
+    return output
+
+def get_case_document_pdf(
+        case_citation = Field(description = citation_description)
         ) -> str:
-        """
-        Given a link, returns whether or not the link is valid.
-        If it is not valid, it should not be used in any output.
-        """  
-        pdf_pattern = re.compile(r'^https://static.case.law/.*')
-        document_pattern = re.compile(r'^https://case.law/caselaw/?reporter=.*')
-        return "URL is valid" if bool(pdf_pattern.match(url)) | bool(document_pattern.match(url)) else "URL is bad"
-
-    class QueryCaselawArgs(BaseModel):
-        query: str = Field(..., description="The user query.")
-        citations: Optional[str] = Field(default = None, 
-                                         description = "The citations of the case. Optional.",
-                                         examples = ['253 P.2d 136', '10 Alaska 11', '6 C.M.A. 3'])
+    """
+    Given a case citation, returns a valid web url to a pdf of the case record
+    """
+    volume_num, reporter, first_page = extract_components_from_citation(case_citation)
+    res = _get_case_json(reporter, volume_num, first_page)
+    if res is None:
+        return "Case not found; please check the citation."
+    page_number = res["first_page_order"]
+    return f"https://static.case.law/{reporter}/{volume_num}.pdf#page={page_number}"
+
+def get_case_document_page(
+        case_citation = Field(description = citation_description)
+        ) -> str:
+    """
+    Given a case citation, returns a valid web url to a page with information about the case.
+    """
+    volume_num, reporter, first_page = extract_components_from_citation(case_citation)
+    # The case's (usually cached) JSON tells us whether the page exists,
+    # so no request to the page itself is needed.
+    if _get_case_json(reporter, volume_num, first_page) is None:
+        return "Case not found; please check the citation."
+    return f"https://case.law/caselaw/?reporter={reporter}&volume={volume_num}&case={first_page:04d}-01"
+    
+def get_case_name(
+        case_citation = Field(description = citation_description)
+        ) -> Tuple[str, str]:
+    """
+    Given a case citation, returns its name and name abbreviation.
+    """
+    volume_num, reporter, first_page = extract_components_from_citation(case_citation)
+    res = _get_case_json(reporter, volume_num, first_page)
+    if res is None:
+        return "Case not found", "Case not found"
+    return res["name"], res["name_abbreviation"]
+
+def get_cited_cases(
+        case_citation = Field(description = citation_description)
+        ) -> List[dict]:
+    """
+    Given a case citation, returns a list of cases that are cited by the opinion of this case.
+    The output is a list of cases, each a dict with the citation, name and name_abbreviation of the case.
+    """
+    volume_num, reporter, first_page = extract_components_from_citation(case_citation)
+    res = _get_case_json(reporter, volume_num, first_page)
+    if res is None:
+        return "Case not found; please check the citation."
+    citations = [citation["cite"] for citation in res["cites_to"][:10]]
+
+    def fetch_one(citation):
+        try:
+            volume_num, reporter, first_page = extract_components_from_citation(citation)
+        except ValueError:
+            return None
+        case = _get_case_json(reporter, volume_num, first_page)
+        if case is None:
+            return None
+        return {
+            "citation": citation,
+            "name": case["name"],
+            "name_abbreviation": case["name_abbreviation"]
+        }
+
+    # The lookups are independent, so fetch them concurrently instead of
+    # issuing up to 10 sequential HTTPS round-trips. Going through
+    # _fetch_case_json also warms the shared cache, so follow-up tool
+    # calls on any cited case are served without touching the network.
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        cases = list(executor.map(fetch_one, citations))
+    return [case for case in cases if case is not None]
+
+def validate_url(
+        url = Field(description = "A web url pointing to case-law document")
+    ) -> str:
+    """
+    Given a link, returns whether or not the link is valid.
+    If it is not valid, it should not be used in any output.
+    """
+    return "URL is valid" if url.startswith(_VALID_URL_PREFIXES) else "URL is bad"
+
+class QueryCaselawArgs(BaseModel):
+    query: str = Field(..., description="The user query.")
+    citations: Optional[str] = Field(default = None, 
+                                     description = "The citations of the case. Optional.",
+                                     examples = ['253 P.2d 136', '10 Alaska 11', '6 C.M.A. 3'])
+
+def create_assistant_tools(cfg):
 
     vec_factory = VectaraToolFactory(vectara_api_key=cfg.api_key, 
                                      vectara_customer_id=cfg.customer_id, 
@@ -189,9 +270,7 @@ def get_agent_config() -> OmegaConf:
     })
     return cfg
 
-def initialize_agent(_cfg, update_func=None):
-    
-    legal_assistant_instructions = """
+legal_assistant_instructions = """
     - You are a helpful legal assistant, with expertise in case law for the state of Alaska.
     - The ask_caselaw tool is your primary tools for finding information about cases. 
       Do not use your own knowledge to answer questions.
@@ -217,8 +296,9 @@ def initialize_agent(_cfg, update_func=None):
     - Never discuss politics, and always respond politely.
     """
 
+def initialize_agent(_cfg, update_func=None, tools=None):
     agent = Agent(
-        tools=create_assistant_tools(_cfg),
+        tools=tools if tools is not None else create_assistant_tools(_cfg),
         topic="Case law in Alaska",
         custom_instructions=legal_assistant_instructions,
         update_func=update_func
@@ -1,11 +1,14 @@
-from PIL import Image
 import sys
 import uuid
 import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import nest_asyncio
 import asyncio
 
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from streamlit_pills import pills
 from streamlit_feedback import streamlit_feedback
 
@@ -14,15 +17,24 @@ from openinference.instrumentation.llama_index import LlamaIndexInstrumentor
 
 from vectara_agentic.agent import AgentStatusType
 
-from agent import initialize_agent, get_agent_config
+from agent import initialize_agent, get_agent_config, create_assistant_tools, prefetch_case_citations
 from utils import thumbs_feedback, escape_dollars_outside_latex, send_amplitude_data
 
 initial_prompt = "How can I help you today?"
 instrumented = False
 
+# Builds the agent off the script thread so the first page paint isn't
+# blocked on tool construction.
+_warmup_executor = ThreadPoolExecutor(max_workers=1)
+
+sidebar_about = (
+    "## How this works?\n"
+    "This app was built with [Vectara](https://vectara.com).\n\n"
+    "It demonstrates the use of Agentic RAG functionality with Vectara"
+)
+
 # Setup for HTTP API Calls to Amplitude Analytics
-if 'device_id' not in st.session_state:
-    st.session_state.device_id = str(uuid.uuid4())
+st.session_state.setdefault('device_id', str(uuid.uuid4()))
 
 if "feedback_key" not in st.session_state:
         st.session_state.feedback_key = 0
@@ -44,32 +56,60 @@ def update_func(status_type: AgentStatusType, msg: str):
         output = f"{status_type.value} - {msg}"
         st.session_state.log_messages.append(output)
 
+@st.cache_resource
+def get_config_and_examples():
+    # Config comes from the environment and never changes within a process,
+    # so parse it (and the example questions) once for all sessions.
+    cfg = get_agent_config()
+    example_messages = [example.strip() for example in cfg.examples.split(";")] if cfg.examples else []
+    return cfg, [em for em in example_messages if len(em) > 0]
+
+@st.cache_resource
+def load_logo():
+    # Deferred so the PIL import and PNG decode happen once, not on every rerun.
+    from PIL import Image
+    return Image.open('Vectara-logo.png')
+
+@st.cache_resource(show_spinner=False)
+def get_tools(corpus_id, _cfg):
+    # Tool construction (including the Vectara RAG tool) depends only on the
+    # config, so share one tool suite across sessions. The Agent itself holds
+    # conversation state and must stay per-session.
+    return create_assistant_tools(_cfg)
+
+def get_session_agent():
+    if 'agent' not in st.session_state:
+        st.session_state.agent = st.session_state._agent_future.result()
+    return st.session_state.agent
+
 async def launch_bot():
     def reset():
         st.session_state.messages = [{"role": "assistant", "content": initial_prompt, "avatar": "🦖"}]
         st.session_state.thinking_message = "Agent at work..."
-        st.session_state.log_messages = []
+        st.session_state.log_messages = deque(maxlen=500)
         st.session_state.prompt = None
         st.session_state.ex_prompt = None
         st.session_state.first_turn = True
         st.session_state.show_logs = False
-        if 'agent' not in st.session_state:
-            st.session_state.agent = initialize_agent(cfg, update_func=update_func)
+        if 'agent' not in st.session_state and '_agent_future' not in st.session_state:
+            # Warm up in the background; the sidebar and chat box render while
+            # tools are being built. get_session_agent() joins the future.
+            st.session_state._agent_future = _warmup_executor.submit(
+                lambda c=cfg: initialize_agent(c, update_func=update_func,
+                                               tools=get_tools(c.corpus_id, c)))
 
     if 'cfg' not in st.session_state:
-        cfg = get_agent_config()
+        cfg, example_messages = get_config_and_examples()
         st.session_state.cfg = cfg
         st.session_state.ex_prompt = None
-        example_messages = [example.strip() for example in cfg.examples.split(";")] if cfg.examples else []
-        st.session_state.example_messages = [em for em in example_messages if len(em)>0]
+        st.session_state.example_messages = example_messages
         reset()
 
     cfg = st.session_state.cfg
 
     # left side content
     with st.sidebar:
-        image = Image.open('Vectara-logo.png')
-        st.image(image, width=175)
+        st.image(load_logo(), width=175)
         st.markdown(f"## {cfg['demo_welcome']}")
         st.markdown(f"{cfg['demo_description']}")
 
@@ -81,11 +121,7 @@ async def launch_bot():
                 st.rerun()
 
         st.divider()
-        st.markdown(
-            "## How this works?\n"
-            "This app was built with [Vectara](https://vectara.com).\n\n"
-            "It demonstrates the use of Agentic RAG functionality with Vectara"
-        )
+        st.markdown(sidebar_about)
 
     if "messages" not in st.session_state.keys():
         reset()
@@ -98,9 +134,9 @@ async def launch_bot():
     example_container = st.empty()
     with example_container:
         if show_example_questions():
+            # The selected example is in ex_prompt; clear the pills and let
+            # this same run process it rather than forcing a full rerun.
             example_container.empty()
-            st.session_state.first_turn = False
-            st.rerun()
 
     # User-provided prompt
     if st.session_state.ex_prompt:
@@ -108,9 +144,12 @@ async def launch_bot():
     else:
         prompt = st.chat_input()
     if prompt:
+        # Warm the case-law cache for any cited cases while the LLM plans its
+        # tool calls; by the time a tool runs the JSON is often already local.
+        prefetch_case_citations(prompt)
         st.session_state.messages.append({"role": "user", "content": prompt, "avatar": '🧑‍💻'})
         st.session_state.prompt = prompt  # Save the prompt in session state
-        st.session_state.log_messages = []
+        st.session_state.log_messages = deque(maxlen=500)
         st.session_state.show_logs = False
         with st.chat_message("user", avatar='🧑‍💻'):
             print(f"Starting new question: {prompt}\n")
@@ -121,7 +160,18 @@ async def launch_bot():
     if st.session_state.prompt:
         with st.chat_message("assistant", avatar='🤖'):
             with st.spinner(st.session_state.thinking_message):
-                res = st.session_state.agent.chat(st.session_state.prompt)
+                # agent.chat blocks for the whole LLM round-trip; run it in a
+                # worker thread so the event loop stays responsive. The worker
+                # needs this script run's context attached, otherwise
+                # update_func's st.session_state lookups resolve against an
+                # empty SessionState and every tool callback raises.
+                ctx = get_script_run_ctx()
+
+                def chat_with_ctx():
+                    add_script_run_ctx(threading.current_thread(), ctx)
+                    return get_session_agent().chat(st.session_state.prompt)
+
+                res = await asyncio.to_thread(chat_with_ctx)
                 res = escape_dollars_outside_latex(res)
             message = {"role": "assistant", "content": res, "avatar": '🤖'}
             st.session_state.messages.append(message)
@@ -136,7 +186,6 @@ async def launch_bot():
         st.session_state.ex_prompt = None
         st.session_state.prompt = None
         st.session_state.first_turn = False
-        st.rerun()
 
     # Record user feedback
     if (st.session_state.messages[-1]["role"] == "assistant") & (st.session_state.messages[-1]["content"] != "How can I help you today?"):
@@ -151,8 +200,8 @@ async def launch_bot():
     with log_placeholder.container():
         if st.session_state.show_logs:
             st.button("Hide Logs", on_click=toggle_logs)
-            for msg in st.session_state.log_messages:
-                st.text(msg)
+            # One widget for the whole log instead of one st.text per entry.
+            st.code("\n".join(st.session_state.log_messages), language=None)
         else:
             if len(st.session_state.log_messages) > 0:
                 st.button("Show Logs", on_click=toggle_logs)
@@ -167,5 +216,9 @@ if __name__ == "__main__":
         LlamaIndexInstrumentor().instrument(tracer_provider=tracer_provider)
         instrumented = True
     
-    nest_asyncio.apply()
-    asyncio.run(launch_bot())
+    # Keep one event loop per session instead of tearing one down every rerun,
+    # so connection pools created by the agent's async clients survive.
+    if '_loop' not in st.session_state:
+        st.session_state._loop = asyncio.new_event_loop()
+    nest_asyncio.apply(st.session_state._loop)
+    st.session_state._loop.run_until_complete(launch_bot())
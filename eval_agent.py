@@ -2,10 +2,11 @@ import phoenix as px
 from phoenix.trace.dsl import SpanQuery
 from phoenix.trace import SpanEvaluations
 
-import json
+import numpy as np
+import orjson
 import pandas as pd
 
-def query_vectara_spans():
+def query_vectara_spans(client):
     query = SpanQuery().select(
         "output.value",
         "parent_id",
@@ -13,55 +14,75 @@ def query_vectara_spans():
     )
 
     # Execute the query and return the results
-    client = px.Client()
     return client.query_spans(query, project_name="vectara-agentic")
 
-def extract_fcs_value(output):
+def _safe_loads(output):
     try:
-        # Convert output to JSON
-        output_json = json.loads(output)
-        
-        # Try to extract metadata.fcs
-        if 'metadata' in output_json and 'fcs' in output_json['metadata']:
-            return output_json['metadata']['fcs']
-    except json.JSONDecodeError:
+        return orjson.loads(output)
+    except (TypeError, orjson.JSONDecodeError):
         print(f"Failed to parse JSON: {output}")
-    except KeyError:
-        print(f"'fcs' not found in: {output_json}")
-    return None
+        return {}
 
-def find_top_level_parent_id(row, all_spans):
-    current_id = row['parent_id']
-    while current_id is not None:
-        parent_row = all_spans[all_spans.index == current_id]
-        if parent_row.empty:
-            break
-        new_parent_id = parent_row['parent_id'].iloc[0]
-        if new_parent_id == current_id:
-            break
-        if new_parent_id is None:
-            return current_id
-        current_id = new_parent_id
-    return current_id
+def extract_fcs_scores(outputs):
+    """
+    Extracts metadata.fcs from a Series of JSON payloads in one pass.
+    json_normalize emits NaN for rows where the path is missing, so no
+    per-row try/except is needed.
+    """
+    # Only rows whose raw payload mentions "fcs" can contribute a score, so
+    # skip the full JSON parse for the rest; the substring scan is ~100x
+    # cheaper than parsing a span document.
+    parsed = [
+        _safe_loads(output) if isinstance(output, str) and '"fcs"' in output else {}
+        for output in outputs
+    ]
+    normalized = pd.json_normalize(parsed)
+    if 'metadata.fcs' not in normalized.columns:
+        return pd.Series(None, index=outputs.index, dtype='float64')
+    return pd.Series(normalized['metadata.fcs'].to_numpy(), index=outputs.index)
 
 def add_top_level_parent_id(vectara_spans, all_spans):
-    vectara_spans['top_level_parent_id'] = vectara_spans.apply(lambda row: find_top_level_parent_id(row, all_spans), axis=1)
+    # Pointer-jumping over the parent map: each iteration advances every
+    # unfinished row one hop with a single hash-indexed map() over the column,
+    # instead of a per-row Python walk doing an O(N) index scan per hop.
+    parent_of = all_spans['parent_id']
+    current = vectara_spans['parent_id'].copy()
+    while True:
+        next_parent = current.map(parent_of)
+        # A row is done when its next parent is missing (reached the root or
+        # an unknown span) or the chain stops advancing.
+        advance = next_parent.notna() & (next_parent != current)
+        if not advance.any():
+            break
+        current = current.where(~advance, next_parent)
+    vectara_spans['top_level_parent_id'] = current
     return vectara_spans
 
 
 if __name__ == "__main__":
-    all_spans = query_vectara_spans()
+    # One client for both the span query and the evaluation upload, so the
+    # HTTP session and endpoint resolution are set up once.
+    client = px.Client()
+    all_spans = query_vectara_spans(client)
     vectara_spans = all_spans[all_spans['name'] == 'VectaraQueryEngine._query']
     vectara_spans = add_top_level_parent_id(vectara_spans, all_spans)
-    vectara_spans['score'] = vectara_spans['output.value'].apply(lambda x: extract_fcs_value(x))
-    
-    vectara_spans.reset_index(inplace=True)
-    top_level_spans = vectara_spans.copy()
-    top_level_spans['context.span_id'] = top_level_spans['top_level_parent_id']
-    vectara_spans = pd.concat([vectara_spans, top_level_spans], ignore_index=True)
-    vectara_spans.set_index('context.span_id', inplace=True)
+    vectara_spans['score'] = extract_fcs_scores(vectara_spans['output.value'])
     
-    px.Client().log_evaluations(
+    # Each score is logged twice: once under the span's own id and once under
+    # its top-level parent's id. Only the index differs between the halves,
+    # so gather the rows once and assign the combined index directly instead
+    # of copy()+concat which materialized every column twice.
+    combined_index = vectara_spans.index.append(
+        pd.Index(vectara_spans['top_level_parent_id'])).rename('context.span_id')
+    vectara_spans = vectara_spans.iloc[np.tile(np.arange(len(vectara_spans)), 2)]
+    vectara_spans = vectara_spans.set_axis(combined_index)
+
+    # Parent ids can collide with span ids already in the frame (or with each
+    # other); keep the first row per id - the span's own score wins over a
+    # parent-derived duplicate - so the upload doesn't carry redundant rows.
+    vectara_spans = vectara_spans[~vectara_spans.index.duplicated(keep='first')]
+
+    client.log_evaluations(
         SpanEvaluations(
             dataframe=vectara_spans,
             eval_name="Vectara FCS",
@@ -1,17 +1,33 @@
 import os
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import re
+from concurrent.futures import ThreadPoolExecutor
 
 import streamlit as st
 
 from langdetect import detect_langs
 from langcodes import Language
 
-headers = {
-    'Content-Type': 'application/json',
-    'Accept': '*/*'
-}
+# Single C-level pass instead of str.replace walking the whole response.
+_DOLLAR_ESCAPE_TABLE = str.maketrans({'$': '\\$'})
+
+# LaTeX equations are delimited by double $$ only.
+_LATEX_PATTERN = re.compile(r'\$\$.*?\$\$', re.DOTALL)
+
+# Analytics posts run here so they don't block the Streamlit rerun.
+_analytics_executor = ThreadPoolExecutor(max_workers=2)
+
+# Shared session so repeated analytics posts reuse one keep-alive connection
+# instead of a fresh TLS handshake per event.
+_http = requests.Session()
+_http.mount('https://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504],
+                      allowed_methods=frozenset(['POST']))
+))
 
 def identify_language(response):
     lang_code = detect_langs(response)[0].lang
@@ -31,8 +47,12 @@ def thumbs_feedback(feedback, **kwargs):
 
 def send_amplitude_data(user_query, bot_response, demo_name, feedback=None):
     # Send query and response to Amplitude Analytics
+    amplitude_token = os.getenv('AMPLITUDE_TOKEN')
+    if not amplitude_token:
+        # No token configured (common in local dev) - the POST would just 400.
+        return
     data = {
-        "api_key": os.getenv('AMPLITUDE_TOKEN'),
+        "api_key": amplitude_token,
         "events": [{
             "device_id": st.session_state.device_id,
             "event_type": "submitted_query",
@@ -48,14 +68,16 @@ def send_amplitude_data(user_query, bot_response, demo_name, feedback=None):
     if feedback:
         data["events"][0]["event_properties"]["feedback"] = feedback
 
-    response = requests.post('https://api2.amplitude.com/2/httpapi', headers=headers, data=json.dumps(data))
+    _analytics_executor.submit(_post_amplitude_events, data)
+
+def _post_amplitude_events(data):
+    response = _http.post('https://api2.amplitude.com/2/httpapi', json=data, timeout=10)
     if response.status_code != 200:
         print(f"Amplitude request failed with status code {response.status_code}. Response Text: {response.text}")
 
 def escape_dollars_outside_latex(text):
-    # Define a regex pattern to find LaTeX equations (double $$ only)
-    pattern = r'\$\$.*?\$\$'
-    latex_matches = re.findall(pattern, text, re.DOTALL)
+    # Find LaTeX equations so they can be shielded from the escaping below
+    latex_matches = _LATEX_PATTERN.findall(text)
     
     # Placeholder to temporarily store LaTeX equations
     placeholders = {}
@@ -65,7 +87,7 @@ def escape_dollars_outside_latex(text):
         text = text.replace(match, placeholder)
     
     # Escape dollar signs in the rest of the text
-    text = text.replace('$', '\\$')
+    text = text.translate(_DOLLAR_ESCAPE_TABLE)
     
     # Replace placeholders with the original LaTeX equations
     for placeholder, original in placeholders.items():